@@ -1,19 +1,27 @@
 import os
 import uuid
 import shutil
-import subprocess
-import sys
+import tempfile
+import traceback
 from pathlib import Path
 import zipfile
-import io
 import streamlit as st
 from streamlit.components.v1 import html as st_html
 
+from main import build_parser, run
+
 BASE_DIR = Path(__file__).parent.resolve()
 UPLOAD_DIR = BASE_DIR / "uploads"
 OUTPUTS_DIR = BASE_DIR / "frontend_outputs"
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUTS_DIR.mkdir(exist_ok=True)
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+# SVG/HTML 等文本输出在低压缩级别下体积相近，CPU 开销明显更低
+ZIP_COMPRESSLEVEL = 1
+# 已压缩的输出格式，打包时不再二次压缩
+STORED_SUFFIXES = frozenset({'.png', '.jpg', '.jpeg', '.pdf', '.zip', '.gz', '.svgz'})
+# 输出文件后缀 -> 预览类别
+SUFFIX_MAP = {'.html': 'html', '.htm': 'html', '.txt': 'text', '.md': 'text'}
 
 
 st.set_page_config(page_title="技术路线图生成器", layout="centered")
@@ -26,82 +34,76 @@ if uploaded is not None:
   job_id = uuid.uuid4().hex
   filename = uploaded.name
   saved_path = UPLOAD_DIR / f"{job_id}_{filename}"
+  # 分块写盘，避免 getbuffer()/read() 把整个文件再复制一份到内存
+  uploaded.seek(0)
   with open(saved_path, "wb") as fh:
-    fh.write(uploaded.getbuffer())
+    shutil.copyfileobj(uploaded, fh, length=UPLOAD_CHUNK_SIZE)
+  uploaded = None
 
-  out_dir = OUTPUTS_DIR / f"out_{job_id}"
-  if out_dir.exists():
-    shutil.rmtree(out_dir)
-  out_dir.mkdir(parents=True, exist_ok=True)
+  # 每个任务使用独立的新建目录，job_id 唯一，无需预先清理
+  out_dir = Path(tempfile.mkdtemp(prefix=f'out_{job_id}_', dir=OUTPUTS_DIR))
 
   with st.spinner('技术路线图正在生成，请耐心等待...'):
     # main.py 期望 --output 是文件前缀（不含扩展名），不是目录路径。
     # 这里构造一个输出前缀：out_dir/roadmap
     output_prefix = out_dir / 'roadmap'
-    cmd = [
-      sys.executable,
-      str(Path(__file__).parent / 'main.py'),
+    # 直接在当前进程内调用 main.run，避免每次上传都重新启动解释器并重复导入依赖
+    args = build_parser().parse_args([
       '--input', str(saved_path),
       '--output', str(output_prefix),
-    ]
+    ])
+    # 状态信息取自 run() 的返回值，而不是重定向进程级 sys.stdout：
+    # Streamlit 的多个会话在不同线程中运行，重定向会相互串扰
+    run_output = ''
+    run_error = None
     try:
-      proc = subprocess.run(cmd, capture_output=True, text=True, timeout=60*60)
-    except subprocess.TimeoutExpired:
-      st.error('处理超时')
-      st.stop()
+      outpath = run(args)
+      run_output = f'已生成：{outpath}'
+    except Exception:
+      run_error = traceback.format_exc()
 
-  if proc.returncode != 0:
-    st.error('子进程返回错误')
-    st.text(proc.stdout)
-    st.text(proc.stderr)
+  if run_error is not None:
+    st.error('生成过程出错')
+    st.text(run_error)
   else:
     st.success('生成完成')
 
-    # 查找可预览文件（优先 HTML）
-    preview_path = None
-    for root, dirs, files in os.walk(out_dir):
-      for name in files:
-        lower = name.lower()
-        if lower.endswith(('.html', '.htm')):
-          preview_path = Path(root) / name
-          break
-      if preview_path:
-        break
+    # 输出均以 out_dir/roadmap.* 平铺写出，单次 scandir 按后缀分类即可，无需递归遍历
+    with os.scandir(out_dir) as it:
+      entries = [e for e in it if e.is_file()]
+    buckets = {'html': [], 'text': [], 'other': []}
+    for e in entries:
+      buckets[SUFFIX_MAP.get(os.path.splitext(e.name)[1].lower(), 'other')].append(e)
+    html_entries = buckets['html']
+    text_entries = buckets['text']
 
-    if preview_path and preview_path.exists():
-      content = preview_path.read_text(encoding='utf-8', errors='ignore')
+    # 查找可预览文件（优先 HTML）
+    if html_entries:
+      preview_path = Path(html_entries[0].path)
+      content = preview_path.read_bytes().decode('utf-8', 'ignore')
       st_html(content, height=600, scrolling=True)
-    else:
+    elif text_entries:
       # 查找文本类型
-      text_path = None
-      for root, dirs, files in os.walk(out_dir):
-        for name in files:
-          if name.lower().endswith(('.txt', '.md')):
-            text_path = Path(root) / name
-            break
-        if text_path:
-          break
-
-      if text_path and text_path.exists():
-        text = text_path.read_text(encoding='utf-8', errors='ignore')
-        st.code(text)
-      else:
-        # 打包为 zip 并提供下载
-        buf = io.BytesIO()
-        with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
-          for root, dirs, files in os.walk(out_dir):
-            for name in files:
-              file_path = Path(root) / name
-              arcname = file_path.relative_to(out_dir)
-              zf.write(file_path, arcname)
-        buf.seek(0)
-        st.download_button('下载生成结果（ZIP）', data=buf, file_name=f'result_{job_id}.zip')
-
-    # 显示子进程输出以便调试
-    if proc.stdout:
-      st.subheader('子进程输出')
-      st.text(proc.stdout)
-    if proc.stderr:
-      st.subheader('子进程错误输出')
-      st.text(proc.stderr)
+      text_path = Path(text_entries[0].path)
+      text = text_path.read_bytes().decode('utf-8', 'ignore')
+      st.code(text)
+    else:
+      # 打包为 zip 并提供下载；直接写入磁盘临时文件，避免在内存中再缓冲整个压缩包
+      with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as zip_tmp:
+        with zipfile.ZipFile(zip_tmp, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESSLEVEL) as zf:
+          for e in entries:
+            # 已压缩格式直接存储，重复 DEFLATE 只耗 CPU 几乎不省空间
+            ext = os.path.splitext(e.name)[1].lower()
+            compress = zipfile.ZIP_STORED if ext in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+            zf.write(e.path, e.name, compress_type=compress)
+      try:
+        # st.download_button 只接受 BufferedReader 等特定类型，需以 'rb' 重新打开；数据在调用时即被读取
+        with open(zip_tmp.name, 'rb') as zip_fh:
+          st.download_button('下载生成结果（ZIP）', data=zip_fh, file_name=f'result_{job_id}.zip')
+      finally:
+        os.unlink(zip_tmp.name)
 
+    # 显示运行输出以便调试
+    if run_output:
+      st.subheader('运行输出')
+      st.text(run_output)
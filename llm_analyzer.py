@@ -5,17 +5,32 @@ LLM 分析模块：调用 DeepSeek API 动态解析论文结构并返回 Roadmap
 
 import re
 import json
+import functools
 from typing import Optional
 
 from schemas import Roadmap
 from pydantic import ValidationError
 from fallback import build_fallback_roadmap
 import streamlit as st
-import openai
+
+try:
+    import orjson
+
+    def _loads(raw: str):
+        # orjson 直接解析 UTF-8 字节，比标准库 json 更快
+        return orjson.loads(raw.encode("utf-8"))
+except ImportError:  # 未安装 orjson 时回退标准库
+    _loads = json.loads
 
 # 从 Streamlit Secret 里读取 OpenAI Key
 api_key = st.secrets["OPENAI_API_KEY"]
 
+DEEPSEEK_BASE_URL = "https://api.deepseek.com/v1"
+
+# 预编译正则，避免每次请求重复编译
+_JSON_BLOCK_RE = re.compile(r"```\s*json\s*([\s\S]*?)```", re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*}\s*$")
+
 
 LLM_SYSTEM_PROMPT = (
     "你是一名科研架构师。请阅读论文，设计一个结构化的技术路线图。请将研究过程划分为 3-5 个主要阶段（如：研究背景与问题、理论框架构建、核心模型设计、实验验证与应用等）。"
@@ -43,24 +58,47 @@ LLM_SYSTEM_PROMPT = (
 
 def _extract_json_block(text: str) -> Optional[str]:
     # 从回答中提取 JSON 代码块或最外层 JSON
-    code_block = re.search(r"```\s*json\s*([\s\S]*?)```", text, flags=re.IGNORECASE)
+    code_block = _JSON_BLOCK_RE.search(text)
     if code_block:
         return code_block.group(1).strip()
+    # find 在首个 "{" 处即停止；rfind 从尾部回扫且限定在 start 之后，两者合计只覆盖一遍文本
     start = text.find("{")
-    end = text.rfind("}")
-    if start != -1 and end != -1 and end > start:
+    if start == -1:
+        return None
+    end = text.rfind("}", start + 1)
+    if end != -1:
         return text[start : end + 1]
     return None
 
 
-def analyze_structure(text: str, model: str = "deepseek-chat", api_key_env: str = "DEEPSEEK_API_KEY", key_file: Optional[str] = None, pass_env: str = "DEEPSEEK_KEY_PASSPHRASE", env_file: Optional[str] = None, key_name: str = "DEEPSEEK_API_KEY") -> Roadmap:
+@functools.cache
+def _get_client(key: str):
+    # 按 key 缓存 OpenAI 客户端，复用连接池与 TLS 上下文
+    from openai import OpenAI
+
+    return OpenAI(api_key=key, base_url=DEEPSEEK_BASE_URL)
+
+
+@functools.cache
+def _get_http_client():
+    # REST 回退通道的持久 httpx 客户端（openai SDK 同样基于 httpx），跨请求复用连接池
+    import httpx
+
+    return httpx.Client(base_url=DEEPSEEK_BASE_URL, timeout=60)
+
+
+def prewarm_client():
+    # 提前构造客户端（导入 SDK、建立 TLS 上下文），供调用方在解析文档的同时并行预热
+    return _get_client(api_key)
+
+
+def analyze_structure(text: str, model: str = "deepseek-chat", api_key_env: str = "DEEPSEEK_API_KEY", key_file: Optional[str] = None, pass_env: str = "DEEPSEEK_KEY_PASSPHRASE", env_file: Optional[str] = None, key_name: str = "DEEPSEEK_API_KEY", client=None) -> Roadmap:
 
     content = None
     # 优先使用 OpenAI SDK 兼容模式（设置 base_url 指向 DeepSeek）
     try:
-        from openai import OpenAI
-
-        client = OpenAI(api_key=api_key, base_url="https://api.deepseek.com/v1")
+        if client is None:
+            client = _get_client(api_key)
         resp = client.chat.completions.create(
             model=model,
             messages=[
@@ -71,10 +109,8 @@ def analyze_structure(text: str, model: str = "deepseek-chat", api_key_env: str
         )
         content = resp.choices[0].message.content
     except Exception:
-        # 回退到 requests 直连 DeepSeek REST API
+        # 回退到 httpx 直连 DeepSeek REST API
         try:
-            import requests
-
             headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
             payload = {
                 "model": model,
@@ -84,7 +120,7 @@ def analyze_structure(text: str, model: str = "deepseek-chat", api_key_env: str
                 ],
                 "temperature": 0.2,
             }
-            r = requests.post("https://api.deepseek.com/v1/chat/completions", headers=headers, json=payload, timeout=60)
+            r = _get_http_client().post("/chat/completions", headers=headers, json=payload)
             r.raise_for_status()
             data_resp = r.json()
             content = data_resp["choices"][0]["message"]["content"]
@@ -94,15 +130,13 @@ def analyze_structure(text: str, model: str = "deepseek-chat", api_key_env: str
 
     raw_json = _extract_json_block(content) or content
     try:
-        data = json.loads(raw_json)
+        data = _loads(raw_json)
     except Exception:
         cleaned = raw_json.replace("'", '"')
-        cleaned = re.sub(r",\s*}\s*$", "}", cleaned)
-        data = json.loads(cleaned)
+        cleaned = _TRAILING_COMMA_RE.sub("}", cleaned)
+        data = _loads(cleaned)
 
     try:
-        roadmap = Roadmap(**data)
-        roadmap.ensure_consistency()
-        return roadmap
+        return Roadmap.model_validate(data)
     except (ValidationError, ValueError) as e:
         return build_fallback_roadmap(text, error=str(e))
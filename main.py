@@ -5,18 +5,17 @@
 
 import os
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
-from parser_docx import read_docx
-from llm_analyzer import analyze_structure
 from fallback import build_fallback_roadmap
-from viz_graphviz import draw_roadmap
 
 
-def main():
+def build_parser() -> argparse.ArgumentParser:
+    # 命令行参数定义；app.py 也复用这里的默认值构造参数对象
     parser = argparse.ArgumentParser(description="论文技术路线图自动生成 Agent")
     parser.add_argument("--input", "-i", type=str, help="输入 .docx 文件路径")
     parser.add_argument("--output", "-o", type=str, default="roadmap", help="输出文件前缀（不含扩展名）")
-    parser.add_argument("--format", "-f", type=str, default="svg", choices=["svg", "png", "pdf"], help="输出格式")
+    parser.add_argument("--format", "-f", type=str, default="svg", choices=["svg", "svgz", "png", "pdf"], help="输出格式（svgz 为 dot 直接输出的 gzip 压缩 SVG）")
     parser.add_argument("--mock", action="store_true", help="使用内置 Mock 数据（跳过 LLM）")
     parser.add_argument("--font", type=str, default="Microsoft YaHei", help="中文字体名称（例如 SimSun, Microsoft YaHei）")
     parser.add_argument("--fontpath", type=str, default="", help="字体文件目录（可选）")
@@ -32,8 +31,11 @@ def main():
     parser.add_argument("--nodesep", type=str, default="0.4", help="Graphviz nodesep 间距")
     parser.add_argument("--style", type=str, default="beautiful", choices=["beautiful", "classic"], help="绘图风格")
 
-    args = parser.parse_args()
+    return parser
+
 
+def run(args: argparse.Namespace) -> str:
+    # 在当前进程内执行完整流程，返回生成文件路径；供 CLI 与 app.py 共用（不向 stdout 输出，由调用方展示结果）
     fontname = args.font
     fontpath = args.fontpath or None
 
@@ -44,7 +46,18 @@ def main():
             raise RuntimeError("未提供 --input .docx 文件路径，或使用 --mock 进行测试")
         if not os.path.exists(args.input):
             raise FileNotFoundError(f"文件不存在：{args.input}")
-        text = read_docx(args.input)
+        # 仅在真实解析时导入：llm_analyzer 会拉起 openai/httpx 等较重依赖，--mock 无需加载
+        from parser_docx import read_docx
+        from llm_analyzer import analyze_structure, prewarm_client
+
+        # 解析文档期间在后台线程预热 LLM 客户端，缩短关键路径
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            warmup = ex.submit(prewarm_client)
+            text = read_docx(args.input)
+            try:
+                client = warmup.result()
+            except Exception:
+                client = None
         roadmap_data = analyze_structure(
             text,
             model=args.model,
@@ -53,9 +66,9 @@ def main():
             pass_env=args.pass_env,
             env_file=(args.env_file or None),
             key_name=args.key_name,
+            client=client,
         )
 
-    roadmap_data.ensure_consistency()
     if args.style == "beautiful":
         from viz_graphviz import generate_beautiful_roadmap
         outpath = generate_beautiful_roadmap(
@@ -65,6 +78,7 @@ def main():
             output_format=args.format,
         )
     else:
+        from viz_graphviz import draw_roadmap
         outpath = draw_roadmap(
             roadmap_data=roadmap_data,
             output_path=args.output,
@@ -76,6 +90,12 @@ def main():
             ranksep=args.ranksep,
             nodesep=args.nodesep,
         )
+    return outpath
+
+
+def main():
+    args = build_parser().parse_args()
+    outpath = run(args)
     print(f"已生成：{outpath}")
 
 
@@ -3,20 +3,28 @@
 文档解析模块：使用 python-docx 读取 .docx 文本并清洗。
 """
 
-import re
 from typing import List
 from docx import Document
+from docx.oxml.ns import qn
+
+_W_P = qn("w:p")
 
 
 def read_docx(file_path: str, max_chars: int = 15000) -> str:
     # 读取并清洗文本，限制最大长度防止 Token 溢出
     doc = Document(file_path)
     lines: List[str] = []
-    for para in doc.paragraphs:
-        text = (para.text or "").strip()
+    running = 0
+    # 与 doc.paragraphs 一致，只取正文顶层段落
+    for p in doc.element.body.iterchildren(_W_P):
+        # CT_P.text 即 Paragraph.text 的底层实现（只取 w:r 与 w:hyperlink/w:r，不进入文本框），
+        # 直接在 XML 元素上取值，省去 Paragraph/Run 代理对象；str.split() 同时完成去首尾空白与连续空白折叠
+        text = " ".join(p.text.split())
         if len(text) >= 2:
-            text = re.sub(r"\s+", " ", text)
             lines.append(text)
+            # 累计长度（含换行符）已达上限即停止，后续段落反正会被截掉
+            running += len(text) + 1
+            if running >= max_chars:
+                break
     full_text = "\n".join(lines)
     return full_text[:max_chars]
-
@@ -5,8 +5,11 @@
 """
 
 from enum import Enum
-from typing import List, Optional
-from pydantic import BaseModel, validator
+from typing import Annotated, List, Optional
+from pydantic import BaseModel, ConfigDict, StringConstraints, field_validator, model_validator
+
+# 字符串字段统一由 pydantic-core 去除首尾空白并拒绝空串，替代逐字段的 Python 校验器
+_STRICT_STR_CONFIG = ConfigDict(str_strip_whitespace=True, str_min_length=1)
 
 
 class NodeType(str, Enum):
@@ -20,69 +23,42 @@ class NodeType(str, Enum):
 
 class ClusterItem(BaseModel):
     # 阶段（行）对象：用于在图中形成一个横向区域
+    model_config = _STRICT_STR_CONFIG
+
     id: str
     label: str
 
-    @validator("id", "label")
-    def not_empty(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError("cluster 字段不能为空")
-        return v.strip()
-
 
 class NodeItem(BaseModel):
     # 节点：包含标识、标签、类型、所属阶段
+    model_config = _STRICT_STR_CONFIG
+
     id: str
     label: str
     type: NodeType
     parent_cluster: str
 
-    @validator("id")
-    def id_not_empty(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError("Node id 不能为空")
-        return v.strip()
-
-    @validator("label")
-    def label_not_empty(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError("Node label 不能为空")
-        return v.strip()
-
-    @validator("parent_cluster")
-    def cluster_not_empty(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError("parent_cluster 不能为空")
-        return v.strip()
-
 
 class EdgeItem(BaseModel):
-    # 边：连接两个节点，可选标签
+    # 边：连接两个节点，可选标签（标签原样保留：不去空白、允许为空串）
+    model_config = _STRICT_STR_CONFIG
+
     source: str
     target: str
-    label: Optional[str] = ""
-
-    @validator("source", "target")
-    def endpoint_not_empty(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError("Edge 端点不能为空")
-        return v.strip()
+    label: Optional[Annotated[str, StringConstraints(strip_whitespace=False, min_length=0)]] = ""
 
 
 class Roadmap(BaseModel):
     # 技术路线图整体数据
+    model_config = _STRICT_STR_CONFIG
+
     title: str
     clusters: List[ClusterItem]
     nodes: List[NodeItem]
     edges: List[EdgeItem]
 
-    @validator("title")
-    def title_not_empty(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError("title 不能为空")
-        return v.strip()
-
-    @validator("clusters")
+    @field_validator("clusters")
+    @classmethod
     def clusters_non_empty(cls, v: List[ClusterItem]) -> List[ClusterItem]:
         if not v:
             raise ValueError("clusters 不能为空")
@@ -91,27 +67,30 @@ class Roadmap(BaseModel):
             raise ValueError("clusters id 不唯一")
         return v
 
-    @validator("nodes")
+    @field_validator("nodes")
+    @classmethod
     def nodes_non_empty(cls, v: List[NodeItem]) -> List[NodeItem]:
         if not v:
             raise ValueError("nodes 不能为空")
         return v
 
-    @validator("edges")
+    @field_validator("edges")
+    @classmethod
     def edges_non_empty(cls, v: List[EdgeItem]) -> List[EdgeItem]:
         # 边可以为空（仅展示结构时）
         return v or []
 
-    def ensure_consistency(self) -> None:
-        # 一致性校验：id 唯一、边端点存在、cluster 声明
-        ids = [n.id for n in self.nodes]
-        if len(ids) != len(set(ids)):
+    @model_validator(mode="after")
+    def check_consistency(self) -> "Roadmap":
+        # 一致性校验在构造时单次完成：id 唯一、边端点存在、cluster 声明
+        node_ids = frozenset(n.id for n in self.nodes)
+        if len(node_ids) != len(self.nodes):
             raise ValueError("节点 id 不唯一")
-        id_set = set(ids)
         for e in self.edges:
-            if e.source not in id_set or e.target not in id_set:
+            if e.source not in node_ids or e.target not in node_ids:
                 raise ValueError(f"边指向不存在的节点: {e.source} -> {e.target}")
-        cluster_ids = {c.id for c in self.clusters}
+        cluster_ids = frozenset(c.id for c in self.clusters)
         for n in self.nodes:
             if n.parent_cluster not in cluster_ids:
                 raise ValueError(f"节点所属 cluster 未声明: {n.parent_cluster}")
+        return self
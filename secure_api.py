@@ -10,6 +10,7 @@ import os
 import base64
 import json
 import hashlib
+import functools
 from typing import Optional, Dict
 
 
@@ -20,6 +21,12 @@ def _derive_fernet_key(passphrase: str) -> bytes:
 
 
 def _parse_env_file(env_file: str) -> Dict[str, str]:
+    # 按 (路径, 修改时间) 缓存解析结果：文件未变时不再重复读取，编辑后自动失效；返回副本以免调用方改动缓存
+    return dict(_parse_env_file_cached(env_file, os.stat(env_file).st_mtime_ns))
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_env_file_cached(env_file: str, mtime_ns: int) -> Dict[str, str]:
     # 解析简单 .env 文件（KEY=VALUE，支持引号与注释），返回字典
     data: Dict[str, str] = {}
     with open(env_file, "r", encoding="utf-8") as fr:
@@ -39,8 +46,7 @@ def _parse_env_file(env_file: str) -> Dict[str, str]:
 def load_api_key(api_key_env: str = "DEEPSEEK_API_KEY", encrypted_file: Optional[str] = None, pass_env: str = "DEEPSEEK_KEY_PASSPHRASE", env_file: Optional[str] = None, key_name: str = "DEEPSEEK_API_KEY") -> str:
     # 读取 API Key：优先 .env 文件；其次加密文件；最后环境变量
     if env_file and os.path.exists(env_file):
-        envs = _parse_env_file(env_file)
-        val = envs.get(key_name)
+        val = _parse_env_file(env_file).get(key_name)
         if val:
             return val
 
@@ -5,9 +5,17 @@
 """
 
 import os
+import re
+import asyncio
+import contextlib
+import functools
+import subprocess
+from sys import intern
 import graphviz
-from typing import Dict, List, Optional, Tuple
-from schemas import Roadmap, NodeItem, EdgeItem, NodeType, ClusterItem
+from graphviz.quoting import a_list, attr_list, quote, quote_edge
+from collections import defaultdict
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+from schemas import Roadmap, NodeItem, NodeType, ClusterItem
 
 
 def _apply_font_env(fontpath: Optional[str]) -> None:
@@ -15,8 +23,9 @@ def _apply_font_env(fontpath: Optional[str]) -> None:
     if fontpath and os.path.exists(fontpath):
         os.environ["GDFONTPATH"] = fontpath
 
+@functools.lru_cache(maxsize=32)
 def _parse_aspect(aspect: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
-    # 将 "3:4"、"4:3"、"9:16" 等转换为 ratio（宽/高）与 size 提示
+    # 将 "3:4"、"4:3"、"9:16" 等转换为 ratio（宽/高）与 size 提示；调用方通常只传少数几种取值，结果按参数缓存
     if not aspect:
         return None
     s = aspect.strip().lower()
@@ -29,22 +38,215 @@ def _parse_aspect(aspect: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
                 ratio = str(wv / hv)
                 # size 只作提示，不强制（SVG 更适合按视窗缩放）
                 return (ratio, None)
-        except Exception:
+        except ValueError:
             return None
     return None
 
 
-def draw_roadmap(
+def _chunks(lst: List[str], size: int) -> List[List[str]]:
+    # 按 size 切分列表；空列表返回单个空批次，保证每个 task 至少占一行
+    return [lst[i : i + size] for i in range(0, len(lst), size)] or [[]]
+
+
+BEAUTIFUL_EDGE_DEFAULT: Dict[str, str] = {"color": "#333333"}
+
+
+def _beautiful_edge_rule(src_type: NodeType, tgt_type: NodeType) -> Dict[str, str]:
+    # generate_beautiful_roadmap 的连线规则（rankdir=LR，四列依次为 Phase / Task / Sub / Method）：
+    # - 任何涉及 method 的边隐藏，仅保留布局约束
+    # - 只有 task -> sub_content 显示为无箭头虚线（column2 -> column3），其余涉及 sub_content 的边隐藏
+    # - task -> task 在 LR 布局中位于同一 rank（垂直堆叠），用 constraint=false 只画箭头不参与定序
+    if src_type == NodeType.method or tgt_type == NodeType.method:
+        return {"color": "#333333", "style": "invis", "arrowhead": "none", "constraint": "true"}
+    if src_type == NodeType.task and tgt_type == NodeType.sub_content:
+        return {"color": "#333333", "style": "dashed", "arrowhead": "none"}
+    if src_type == NodeType.sub_content or tgt_type == NodeType.sub_content:
+        return {"color": "#333333", "style": "invis", "arrowhead": "none"}
+    if src_type == NodeType.task and tgt_type == NodeType.task:
+        return {"color": "#333333", "style": "solid", "constraint": "false"}
+    return BEAUTIFUL_EDGE_DEFAULT
+
+
+# 模块加载时对所有类型组合预先求值，绘制时每条边只需一次字典查找
+BEAUTIFUL_EDGE_RULES: Dict[Tuple[NodeType, NodeType], Dict[str, str]] = {
+    (src, tgt): _beautiful_edge_rule(src, tgt) for src in NodeType for tgt in NodeType
+}
+
+
+# SVG 精简：只处理标签内部（属性值中的坐标），不动标签之间的文本内容
+_SVG_TAG_RE = re.compile(r"<[^>]*>")
+_SVG_LONG_DECIMAL_RE = re.compile(r"(\d)\.(\d{2})\d+")
+_SVG_INTER_TAG_WS_RE = re.compile(r">\s+<")
+_SVG_PREAMBLE_RE = re.compile(r"\A(?:\s*<\?xml[^>]*\?>|\s*<!DOCTYPE[^>]*>|\s*<!--.*?-->)*\s*", re.DOTALL)
+
+
+def _minify_svg(path: str) -> None:
+    # 坐标保留两位小数、去掉标签间空白与 XML 声明/DOCTYPE/注释前言，就地重写 SVG 文件
+    with open(path, "r", encoding="utf-8") as fr:
+        svg = fr.read()
+    svg = _SVG_PREAMBLE_RE.sub("", svg, count=1)
+    svg = _SVG_TAG_RE.sub(lambda m: _SVG_LONG_DECIMAL_RE.sub(r"\1.\2", m.group(0)), svg)
+    svg = _SVG_INTER_TAG_WS_RE.sub("><", svg)
+    with open(path, "w", encoding="utf-8") as fw:
+        fw.write(svg)
+
+
+# draw_roadmap 节点样式；sub_content/method 样式作为图级节点默认值，task 只保留与之不同的属性
+_PHASE_STYLE = {"shape": "box", "style": "rounded,filled", "fillcolor": "#2b3a67", "fontcolor": "white", "color": "#2b3a67"}
+_METHOD_STYLE = {"shape": "parallelogram", "style": "filled", "fillcolor": "#eef3ff", "color": "#7aa2f7"}
+_TASK_STYLE = {"shape": "box", "fillcolor": "#ffffff", "color": "#4a6fa5"}
+
+# 预先格式化的节点属性串（与 graphviz 的排序/转义规则一致），每个节点直接拼接
+_PHASE_NODE_ATTRS = a_list(None, kwargs={**_PHASE_STYLE, "group": "phase"})
+_TASK_NODE_ATTRS = a_list(None, kwargs={**_TASK_STYLE, "group": "task"})
+_METHOD_NODE_ATTRS = a_list(None, kwargs={"group": "method"})
+_BEAUTIFUL_STAGE_ATTRS = a_list(None, kwargs={"fillcolor": "#2b3a67", "color": "#2b3a67", "fontcolor": "white", "width": "2.5"})
+_BEAUTIFUL_TASK_ATTRS = a_list(None, kwargs={"style": "filled", "color": "black", "width": "2.5"})
+_BEAUTIFUL_SUB_ATTRS = a_list(None, kwargs={"shape": "note", "style": "dashed", "fillcolor": "#F5F5F5", "color": "#666666", "width": "2.0"})
+_BEAUTIFUL_METHOD_ATTRS = a_list(None, kwargs={"shape": "ellipse", "style": "filled", "fillcolor": "#E1F5FE", "color": "#01579B"})
+
+
+# DOT 源文件写缓冲大小：大图时避免大量小块写入
+DOT_WRITE_BUFFER = 1 << 20
+# dot 渲染超时（秒），避免异常输入让渲染无限挂起
+DOT_TIMEOUT = 3600
+
+
+class _DotWriter:
+    # 流式 DOT 写出器：接口与 graphviz.Digraph 常用子集一致（attr/node/edge/subgraph/render），
+    # 但顶层语句直接写入磁盘上的 .gv 文件，不在内存里累积整份 body 列表。
+    # 子图语句先缓存在自身列表中，退出 with 块时再整体写回父图，与 graphviz 的输出顺序保持一致。
+
+    def __init__(self, stream: Optional[IO[str]] = None, path: Optional[str] = None) -> None:
+        self._stream = stream
+        self.path = path
+        self._lines: List[str] = []
+
+    @classmethod
+    def open(cls, path: str) -> "_DotWriter":
+        return cls(stream=open(path, "w", encoding="utf-8", buffering=DOT_WRITE_BUFFER), path=path)
+
+    def begin(self, name: str, comment: Optional[str] = None, graph_attr: Optional[Dict[str, str]] = None, node_attr: Optional[Dict[str, str]] = None, edge_attr: Optional[Dict[str, str]] = None) -> None:
+        # 写出图头：注释、digraph 声明与图级默认属性
+        if comment:
+            self._stream.write(f"// {comment}\n")
+        self._stream.write(f"digraph {quote(name)} {{\n")
+        for kw, attrs in (("graph", graph_attr), ("node", node_attr), ("edge", edge_attr)):
+            if attrs:
+                self._stream.write(f"\t{kw}{attr_list(None, kwargs=attrs)}\n")
+
+    def discard(self) -> None:
+        # 构建中途出错时关闭源文件并删除写了一半的 .gv
+        self._stream.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
+
+    def _write(self, line: str) -> None:
+        if self._stream is not None:
+            self._stream.write(line)
+        else:
+            self._lines.append(line)
+
+    def attr(self, kw: Optional[str] = None, **attrs: str) -> None:
+        if not attrs:
+            return
+        if kw is None:
+            self._write(f"\t{a_list(None, kwargs=attrs)}\n")
+        else:
+            self._write(f"\t{kw}{attr_list(None, kwargs=attrs)}\n")
+
+    def node(self, name: str, label: Optional[str] = None, **attrs: str) -> None:
+        self._write(f"\t{quote(name)}{attr_list(label, kwargs=attrs)}\n")
+
+    def node_refs(self, names: List[str]) -> None:
+        # 在一行内引用多个已声明的节点（如 rank=same 分组），等价于逐个 node(name) 但源文件更短
+        self._write(f"\t{'; '.join(quote(name) for name in names)}\n")
+
+    def styled_node(self, name: str, label: str, attrs: str) -> None:
+        # attrs 为预先格式化好的属性串（见模块顶部 *_ATTRS 常量），避免每个节点重复展开 kwargs 并格式化
+        self._write(f"\t{quote(name)} [label={quote(label)} {attrs}]\n")
+
+    def edge(self, tail_name: str, head_name: str, label: Optional[str] = None, **attrs: str) -> None:
+        self._write(f"\t{quote_edge(tail_name)} -> {quote_edge(head_name)}{attr_list(label, kwargs=attrs)}\n")
+
+    @contextlib.contextmanager
+    def subgraph(self, name: str) -> Iterator["_DotWriter"]:
+        sub = _DotWriter()
+        yield sub
+        self._write(f"\tsubgraph {quote(name)} {{\n")
+        for line in sub._lines:
+            self._write(f"\t{line}")
+        self._write("\t}\n")
+
+    def _finish(self, filename: str, format: str) -> Tuple[str, List[str]]:
+        # 写完结尾并关闭源文件，返回输出路径与 dot 命令行
+        self._stream.write("}\n")
+        self._stream.close()
+        outfile = f"{filename}.{format}"
+        return outfile, ["dot", "-Kdot", f"-T{format}", self.path, "-o", outfile]
+
+    @contextlib.contextmanager
+    def _running(self, cmd: List[str], cleanup: bool) -> Iterator[None]:
+        # render/render_async 共用：找不到 dot 时转为 ExecutableNotFound，结束后按需删除源文件
+        try:
+            yield
+        except FileNotFoundError as e:
+            raise graphviz.ExecutableNotFound(cmd) from e
+        finally:
+            if cleanup:
+                os.remove(self.path)
+
+    @staticmethod
+    def _check_output(cmd: List[str], outfile: str, format: str, returncode: int, stdout: bytes, stderr: bytes) -> str:
+        # 与 graphviz 自身一致，非零退出时抛出 graphviz.CalledProcessError（异常信息附带 dot 的 stderr）；SVG 输出再做精简
+        if returncode:
+            raise graphviz.CalledProcessError(returncode, cmd, output=stdout, stderr=stderr.decode("utf-8", "replace"))
+        if format == "svg":
+            _minify_svg(outfile)
+        return outfile
+
+    def render(self, filename: str, format: str = "svg", cleanup: bool = False) -> str:
+        # 关闭源文件后调用 dot 可执行文件生成 filename.<format>，返回输出路径
+        outfile, cmd = self._finish(filename, format)
+        with self._running(cmd, cleanup):
+            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=DOT_TIMEOUT)
+        return self._check_output(cmd, outfile, format, proc.returncode, proc.stdout, proc.stderr)
+
+    async def render_async(self, filename: str, format: str = "svg", cleanup: bool = False) -> str:
+        # 与 render 相同，但以异步子进程运行 dot；多张图可用 asyncio.gather 并行渲染
+        outfile, cmd = self._finish(filename, format)
+        with self._running(cmd, cleanup):
+            proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=DOT_TIMEOUT)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise subprocess.TimeoutExpired(cmd, DOT_TIMEOUT)
+        return self._check_output(cmd, outfile, format, proc.returncode, stdout, stderr)
+
+
+def _build_dot(gv_path: str, write_fn: Callable[..., None], *args: Any) -> _DotWriter:
+    # 打开 gv_path 并调用 write_fn(dot, *args) 写出 DOT 源文件；中途出错时关闭并删除写了一半的 .gv
+    dot = _DotWriter.open(gv_path)
+    try:
+        write_fn(dot, *args)
+    except BaseException:
+        dot.discard()
+        raise
+    return dot
+
+
+def _write_roadmap(
+    dot: _DotWriter,
     roadmap_data: Roadmap,
-    output_path: str = "roadmap",
-    output_format: str = "svg",
-    fontname: str = "Microsoft YaHei",
-    fontpath: Optional[str] = None,
-    aspect: Optional[str] = "3:4",
-    max_methods_per_row: int = 3,
-    ranksep: str = "0.7",
-    nodesep: str = "0.4",
-) -> str:
+    fontname: str,
+    fontpath: Optional[str],
+    aspect: Optional[str],
+    max_methods_per_row: int,
+    ranksep: str,
+    nodesep: str,
+) -> None:
     # 全局属性：从上到下、正交线、中文字体，并尽量控制纵横比与间距
     _apply_font_env(fontpath)
 
@@ -63,12 +265,14 @@ def draw_roadmap(
     if ratio_size:
         graph_attrs["ratio"] = ratio_size[0]
 
-    dot = graphviz.Digraph(
+    dot.begin(
         name="TechRoadmap",
         graph_attr=graph_attrs,
+        # 节点默认样式取最常见的 sub_content/method 样式，这两类节点无需逐个重复输出属性
         node_attr={
             "fontname": fontname,
             "fontsize": "11",
+            **_METHOD_STYLE,
         },
         edge_attr={
             "fontname": fontname,
@@ -77,20 +281,32 @@ def draw_roadmap(
         },
     )
 
-    phase_style = {"shape": "box", "style": "rounded,filled", "fillcolor": "#2b3a67", "fontcolor": "white", "color": "#2b3a67"}
-    task_style = {"shape": "box", "style": "filled", "fillcolor": "#ffffff", "color": "#4a6fa5"}
-    method_style = {"shape": "parallelogram", "style": "filled", "fillcolor": "#eef3ff", "color": "#7aa2f7"}
+    # 热循环中把枚举成员绑定为局部变量，并用 is 做身份比较（枚举成员为单例）
+    TASK, SUB, METHOD = NodeType.task, NodeType.sub_content, NodeType.method
 
-    nodes_by_id: Dict[str, NodeItem] = {n.id: n for n in roadmap_data.nodes}
-    edges_by_source: Dict[str, List[EdgeItem]] = {}
+    # 后续只需节点类型：预先建立 id -> 类型映射，每次查找一次字典即可
+    # 本地映射的键统一驻留（不改动 roadmap_data），同一 id 只保留一个字符串对象
+    node_type_by_id: Dict[str, NodeType] = {intern(n.id): n.type for n in roadmap_data.nodes}
+    # 单次遍历边，预先建立 stage -> task、task -> method 的邻接表（保持边的输入顺序）
+    tasks_of_phase: Dict[str, List[str]] = defaultdict(list)
+    methods_of_task: Dict[str, List[str]] = defaultdict(list)
     for e in roadmap_data.edges:
-        edges_by_source.setdefault(e.source, []).append(e)
-
-    # 保留原始节点顺序索引，供按输入顺序排序 cluster 内节点使用
-    node_index: Dict[str, int] = {n.id: idx for idx, n in enumerate(roadmap_data.nodes)}
-
-    # 收集 stage 顺序以便后续添加相邻箭头（display order）
-    stage_order: List[str] = []
+        tgt_type = node_type_by_id.get(e.target)
+        if tgt_type is TASK:
+            tasks_of_phase[e.source].append(e.target)
+        elif tgt_type is METHOD:
+            methods_of_task[e.source].append(e.target)
+
+    # 单次遍历按 (cluster, 是否第1列) 分桶；按输入顺序追加，桶内天然保持原始节点顺序
+    stage_types = (NodeType.phase, NodeType.stage_label)
+    nodes_by_cluster: Dict[Tuple[str, bool], List[NodeItem]] = defaultdict(list)
+    for n in roadmap_data.nodes:
+        nodes_by_cluster[(intern(n.parent_cluster), n.type in stage_types)].append(n)
+
+    # 已有边集合（整个函数只构建一次），避免重复添加相邻箭头
+    existing_pairs = {(intern(e.source), intern(e.target)) for e in roadmap_data.edges}
+    # 上一个已渲染的 stage 节点：在遍历 cluster 时顺带连接第1列相邻箭头（display order）
+    prev_stage: Optional[str] = None
 
     # 按原始顺序遍历 cluster（正序渲染）
     # 为了让虚线大框不包含最左侧的 stage_label（第1列），我们把 stage_label 节点放到子图外面创建，
@@ -100,95 +316,103 @@ def draw_roadmap(
         cluster_label = cluster.label if isinstance(cluster, ClusterItem) else str(cluster)
 
         # stage（最左列）节点：先在主图上创建（不在子图内），保持样式不变
-        stage_nodes = [n for n in roadmap_data.nodes if n.parent_cluster == cluster_id and n.type in (NodeType.phase, NodeType.stage_label)]
-        # 按原始输入顺序排序
-        stage_nodes = sorted(stage_nodes, key=lambda x: node_index.get(x.id, 0))
+        stage_nodes = nodes_by_cluster[(cluster_id, True)]
         for n in stage_nodes:
-            style = phase_style
-            dot.node(n.id, label=n.label, **style, group="phase")
-            stage_order.append(n.id)
-
-        # 其余节点放入 cluster 子图（虚线框内）
+            dot.styled_node(n.id, n.label, _PHASE_NODE_ATTRS)
+            if prev_stage is not None and (prev_stage, n.id) not in existing_pairs:
+                dot.edge(prev_stage, n.id, style="solid", arrowhead="normal")
+                existing_pairs.add((prev_stage, n.id))
+            prev_stage = n.id
+
+        # 其余节点放入 cluster 子图（虚线框内）；既无内部节点也无行布局时不输出空子图
+        cluster_inner_nodes = nodes_by_cluster[(cluster_id, False)]
+        if not cluster_inner_nodes and not any(p.id in tasks_of_phase for p in stage_nodes):
+            continue
         with dot.subgraph(name=f"cluster_{cluster_id}") as c:
             c.attr(style="dashed", color="#9aa5b1", label=cluster_label, labelloc="t", labeljust="l")
-            cluster_inner_nodes = [n for n in roadmap_data.nodes if n.parent_cluster == cluster_id and n.type not in (NodeType.phase, NodeType.stage_label)]
-            # 保持 cluster 内节点按原始输入顺序
-            cluster_inner_nodes = sorted(cluster_inner_nodes, key=lambda x: node_index.get(x.id, 0))
+            c_node = c.styled_node
             for n in cluster_inner_nodes:
-                style = task_style if n.type == NodeType.task else method_style
-                group_val = "task" if n.type == NodeType.task else "method"
-                c.node(n.id, label=n.label, **style, group=group_val)
+                c_node(n.id, n.label, _TASK_NODE_ATTRS if n.type is TASK else _METHOD_NODE_ATTRS)
 
             phase_nodes = stage_nodes
             for p in phase_nodes:
-                row_tasks = [nodes_by_id[e.target] for e in edges_by_source.get(p.id, []) if nodes_by_id.get(e.target) and nodes_by_id[e.target].type == NodeType.task]
-                if not row_tasks:
-                    continue
-                for t in row_tasks:
-                    methods = [nodes_by_id[e.target] for e in edges_by_source.get(t.id, []) if nodes_by_id.get(e.target) and nodes_by_id[e.target].type == NodeType.method]
-
+                for t_id in tasks_of_phase.get(p.id, ()):
                     # 将方法按批次拆分，避免一行过长
-                    def _chunks(lst: List[NodeItem], size: int) -> List[List[NodeItem]]:
-                        return [lst[i : i + size] for i in range(0, len(lst), size)] or [[]]
-
-                    for idx, mchunk in enumerate(_chunks(methods, max_methods_per_row)):
-                        row_name = f"{cluster}_row_{p.id}_{t.id}_{idx}"
+                    for idx, mchunk in enumerate(_chunks(methods_of_task.get(t_id, []), max_methods_per_row)):
+                        row_name = f"{cluster}_row_{p.id}_{t_id}_{idx}"
                         with c.subgraph(name=row_name) as row:
                             row.attr(rank="same")
                             # 使用不可见的 phase 代理节点保证列对齐，但不拉长原始 phase
-                            proxy_id = f"proxy_{p.id}_{t.id}_{idx}"
+                            proxy_id = f"proxy_{p.id}_{t_id}_{idx}"
                             row.node(proxy_id, label="", shape="box", style="invis", width="0", height="0", group="phase")
-                            row.node(t.id)
-                            for m in mchunk:
-                                row.node(m.id)
+                            row.node(t_id)
+                            for m_id in mchunk:
+                                row.node(m_id)
 
             # 为当前 cluster 内的 task（第2列）按现有节点顺序添加相邻箭头（如果不存在）
-            task_nodes_in_cluster = [n.id for n in cluster_inner_nodes if n.type == NodeType.task]
-            existing_pairs = {(e.source, e.target) for e in roadmap_data.edges}
+            task_nodes_in_cluster = [n.id for n in cluster_inner_nodes if n.type is TASK]
             for i in range(len(task_nodes_in_cluster) - 1):
                 a = task_nodes_in_cluster[i]
                 b = task_nodes_in_cluster[i + 1]
                 if (a, b) not in existing_pairs:
                     dot.edge(a, b, style="solid", arrowhead="normal")
+                    existing_pairs.add((a, b))
 
+    dot_edge = dot.edge
     for e in roadmap_data.edges:
         # 如果任一端是 method，则将边设为不可见以移除可视连线但保留布局约束
-        src_node = nodes_by_id.get(e.source)
-        tgt_node = nodes_by_id.get(e.target)
+        src_type = node_type_by_id.get(e.source)
+        tgt_type = node_type_by_id.get(e.target)
         # 规则：
         # - 只允许 Task -> Sub_content 显示为虚线（column2 -> column3），且无箭头
         # - 任何涉及 method 的边保持不可见（原行为）
         # - 其他涉及 sub_content 的边一律不可见
-        if (src_node and src_node.type == NodeType.method) or (tgt_node and tgt_node.type == NodeType.method):
-            dot.edge(e.source, e.target, label=(e.label or ""), style="invis", arrowhead="none")
-        elif (src_node and src_node.type == NodeType.task) and (tgt_node and tgt_node.type == NodeType.sub_content):
-            dot.edge(e.source, e.target, label=(e.label or ""), style="dashed", arrowhead="none")
-        elif (src_node and src_node.type == NodeType.sub_content) or (tgt_node and tgt_node.type == NodeType.sub_content):
+        if src_type is METHOD or tgt_type is METHOD:
+            dot_edge(e.source, e.target, label=(e.label or ""), style="invis", arrowhead="none")
+        elif src_type is TASK and tgt_type is SUB:
+            dot_edge(e.source, e.target, label=(e.label or ""), style="dashed", arrowhead="none")
+        elif src_type is SUB or tgt_type is SUB:
             # 任何其他与 sub_content 有关的连接都设为不可见
-            dot.edge(e.source, e.target, label=(e.label or ""), style="invis", arrowhead="none")
+            dot_edge(e.source, e.target, label=(e.label or ""), style="invis", arrowhead="none")
         else:
-            dot.edge(e.source, e.target, label=(e.label or ""), arrowhead="normal")
+            dot_edge(e.source, e.target, label=(e.label or ""), arrowhead="normal")
 
-    # 在主图上为第1列（stage）添加相邻箭头，按渲染顺序（stage_order）连接
-    existing_pairs = {(e.source, e.target) for e in roadmap_data.edges}
-    for i in range(len(stage_order) - 1):
-        a = stage_order[i]
-        b = stage_order[i + 1]
-        if (a, b) not in existing_pairs:
-            dot.edge(a, b, style="solid", arrowhead="normal")
 
-    outfile = dot.render(filename=output_path, format=output_format, cleanup=True)
-    return outfile
+def draw_roadmap(
+    roadmap_data: Roadmap,
+    output_path: str = "roadmap",
+    output_format: str = "svg",
+    fontname: str = "Microsoft YaHei",
+    fontpath: Optional[str] = None,
+    aspect: Optional[str] = "3:4",
+    max_methods_per_row: int = 3,
+    ranksep: str = "0.7",
+    nodesep: str = "0.4",
+) -> str:
+    # 生成 DOT 源文件并同步调用 dot 渲染，返回输出文件路径
+    dot = _build_dot(f"{output_path}.gv", _write_roadmap, roadmap_data, fontname, fontpath, aspect, max_methods_per_row, ranksep, nodesep)
+    return dot.render(filename=output_path, format=output_format, cleanup=True)
 
 
-def generate_beautiful_roadmap(
+async def draw_roadmap_async(
     roadmap_data: Roadmap,
-    output_filename: str = "roadmap",
-    fontname: str = "Microsoft YaHei",
+    output_path: str = "roadmap",
     output_format: str = "svg",
+    fontname: str = "Microsoft YaHei",
+    fontpath: Optional[str] = None,
+    aspect: Optional[str] = "3:4",
+    max_methods_per_row: int = 3,
+    ranksep: str = "0.7",
+    nodesep: str = "0.4",
 ) -> str:
+    # 异步版本：DOT 源文件同步写出（开销小），dot 渲染在异步子进程中进行
+    dot = _build_dot(f"{output_path}.gv", _write_roadmap, roadmap_data, fontname, fontpath, aspect, max_methods_per_row, ranksep, nodesep)
+    return await dot.render_async(filename=output_path, format=output_format, cleanup=True)
+
+
+def _write_beautiful_roadmap(dot: _DotWriter, roadmap_data: Roadmap, fontname: str) -> None:
     # 4-Column Layout: Phases -> Main Tasks -> Sub-contents -> Methods
-    dot = graphviz.Digraph(name="G", comment="Research Roadmap")
+    dot.begin(name="G", comment="Research Roadmap")
 
     # 布局设置：LR (Left-to-Right)
     dot.attr(rankdir="LR")
@@ -199,46 +423,48 @@ def generate_beautiful_roadmap(
     dot.attr(compound="true")
     dot.attr(newrank="true")
 
+    # 节点默认样式；下面各节点只输出与之不同的属性
     dot.attr("node", fontname=fontname, fontsize="12", shape="box", style="rounded,filled", fillcolor="white")
     dot.attr("edge", fontname=fontname, fontsize="11")
 
-    data = roadmap_data.dict()
-    clusters = data.get("clusters", [])
-    nodes = data.get("nodes", [])
-    edges = data.get("edges", [])
+    # 直接读取模型属性，避免 .dict() 整体序列化出一份嵌套字典
+    clusters = roadmap_data.clusters
+    nodes = roadmap_data.nodes
+    edges = roadmap_data.edges
+    # 本地映射的键统一驻留（不改动 roadmap_data），同一 id 只保留一个字符串对象
+    node_type_by_id: Dict[str, NodeType] = {intern(n.id): n.type for n in nodes}
 
     # 已有边集合，避免重复添加
-    existing_pairs = {(e.get("source"), e.get("target")) for e in edges}
-    # stage 顺序记录（用于生成 column1 相邻箭头）
-    stage_order: List[str] = []
-    # 保留原始节点顺序索引，供按输入顺序排序 cluster 内节点使用
-    node_index_dict: Dict[str, int] = {n["id"]: idx for idx, n in enumerate(nodes)}
+    existing_pairs = {(intern(e.source), intern(e.target)) for e in edges}
+    # 上一个已渲染的 stage 节点（用于在遍历时直接生成 column1 相邻箭头）
+    prev_stage: Optional[str] = None
+    # 单次遍历按 (cluster, 列类别) 分桶；按输入顺序追加，桶内天然保持原始节点顺序
+    nodes_by_cluster: Dict[Tuple[str, NodeType], List[NodeItem]] = defaultdict(list)
+    for n in nodes:
+        ntype = NodeType.stage_label if n.type == NodeType.phase else n.type
+        nodes_by_cluster[(intern(n.parent_cluster), ntype)].append(n)
 
     # 1. 绘制 Clusters (Phases)
     # 按原始顺序遍历 clusters（正序渲染）
     for cluster in clusters:
-        cluster_id = cluster["id"] if isinstance(cluster, dict) else str(cluster)
-        cluster_label = cluster.get("label", "") if isinstance(cluster, dict) else str(cluster)
+        cluster_id = cluster.id if isinstance(cluster, ClusterItem) else str(cluster)
+        cluster_label = cluster.label if isinstance(cluster, ClusterItem) else str(cluster)
 
         # 把 stage_label（第1列）节点放到主图（不在 cluster 子图内），以便虚线大框不包含最左列
-        current_nodes = [n for n in nodes if n.get("parent_cluster") == cluster_id]
-        # 按原始输入顺序排序 cluster 内节点
-        current_nodes = sorted(current_nodes, key=lambda x: node_index_dict.get(x.get("id"), 0))
-        stage_nodes = [n for n in current_nodes if n.get("type") in ("stage_label", "phase")]
+        stage_nodes = nodes_by_cluster[(cluster_id, NodeType.stage_label)]
         for node in stage_nodes:
-            dot.node(
-                node["id"],
-                label=node["label"],
-                shape="box",
-                style="rounded,filled",
-                fillcolor="#2b3a67",
-                color="#2b3a67",
-                fontcolor="white",
-                width="2.5",
-            )
-            stage_order.append(node["id"])
-
-        # 其余节点放入 cluster 子图（虚线框内）
+            dot.styled_node(node.id, node.label, _BEAUTIFUL_STAGE_ATTRS)
+            if prev_stage is not None and (prev_stage, node.id) not in existing_pairs:
+                dot.edge(prev_stage, node.id, style="solid", arrowhead="normal")
+                existing_pairs.add((prev_stage, node.id))
+            prev_stage = node.id
+
+        # 其余节点放入 cluster 子图（虚线框内）；没有内部节点时不输出空子图
+        task_nodes = nodes_by_cluster[(cluster_id, NodeType.task)]
+        sub_nodes = nodes_by_cluster[(cluster_id, NodeType.sub_content)]
+        method_nodes = nodes_by_cluster[(cluster_id, NodeType.method)]
+        if not (task_nodes or sub_nodes or method_nodes):
+            continue
         with dot.subgraph(name=f"cluster_{cluster_id}") as c:
             c.attr(label=cluster_label)
             c.attr(style="dashed")
@@ -246,30 +472,27 @@ def generate_beautiful_roadmap(
             c.attr(fontcolor="#404040")
             c.attr(bgcolor="#F9F9F9")
 
-            task_nodes = [n for n in current_nodes if n.get("type") == "task"]
-            sub_nodes = [n for n in current_nodes if n.get("type") == "sub_content"]
-            method_nodes = [n for n in current_nodes if n.get("type") == "method"]
-
             # 绘制 Task Nodes (第2列)
             for node in task_nodes:
-                c.node(node["id"], label=node["label"], shape="box", style="filled", fillcolor="white", color="black", width="2.5")
+                c.styled_node(node.id, node.label, _BEAUTIFUL_TASK_ATTRS)
 
             # 绘制 Sub-content Nodes (第3列)
             for node in sub_nodes:
                 # 使用花括号或虚线风格
-                c.node(node["id"], label=node["label"], shape="note", style="dashed", fillcolor="#F5F5F5", color="#666666", width="2.0")
+                c.styled_node(node.id, node.label, _BEAUTIFUL_SUB_ATTRS)
 
             # 绘制 Method Nodes (第4列)
             for node in method_nodes:
-                c.node(node["id"], label=node["label"], shape="ellipse", style="filled", fillcolor="#E1F5FE", color="#01579B")
+                c.styled_node(node.id, node.label, _BEAUTIFUL_METHOD_ATTRS)
 
             # 为当前 cluster 内的 task（第2列）按现有节点顺序添加相邻箭头（如果不存在）
-            task_ids = [n.get("id") for n in task_nodes]
+            task_ids = [n.id for n in task_nodes]
             for i in range(len(task_ids) - 1):
                 a = task_ids[i]
                 b = task_ids[i + 1]
                 if (a, b) not in existing_pairs:
                     dot.edge(a, b, style="solid", arrowhead="normal")
+                    existing_pairs.add((a, b))
 
             # 强制布局逻辑：Task -> Sub-content -> Method (水平)
             # 但 Task 内部是垂直连接 (A->B->C)，由 edges 定义
@@ -288,134 +511,34 @@ def generate_beautiful_roadmap(
             # 更好的做法是让 Graphviz 自动处理，我们通过 Edge 约束。
             pass
 
-    # 2. 绘制 Edges
+    # 2. 绘制 Edges（样式按 (源类型, 目标类型) 查表，见 BEAUTIFUL_EDGE_RULES）
     for edge in edges:
-        src_id = edge.get("source")
-        tgt_id = edge.get("target")
-        label = edge.get("label", "")
-        
-        src_node = next((n for n in nodes if n["id"] == src_id), None)
-        tgt_node = next((n for n in nodes if n["id"] == tgt_id), None)
-        
-        edge_attrs = {"color": "#333333"}
-        
-        if src_node and tgt_node:
-            src_type = src_node.get("type")
-            tgt_type = tgt_node.get("type")
-            
-            # 逻辑连接规则：
-            # Task -> Task (垂直向下): 由于 rankdir=LR，这实际上是同级或跨级？
-            # 等等，用户要求 "Task A -> Task B" 是向下箭头。
-            # 在 rankdir=LR 模式下，默认箭头是向右的。
-            # 要实现 "Task A 下方是 Task B"，我们需要它们在 "same rank" 吗？
-            # 或者，如果整个图是 LR，那么 Phases 是从左到右排的吗？
-            # 用户描述：
-            # 第1列：Phases (左)
-            # 第2列：Tasks (中左)
-            # 第3列：Sub-contents (中右)
-            # 第4列：Methods (右)
-            
-            # 如果 rankdir=LR，那么流向是 左->右。
-            # Phase -> Task -> Sub -> Method
-            # 这符合逻辑。
-            
-            # 但是 "Task A -> Task B" (垂直向下) 在 LR 布局中意味着 Task A 和 Task B 在同一列（Rank），但 A 在 B 上方。
-            # Graphviz 在 LR 模式下，节点堆叠是自动的，但没有直接的 "A->B" 向下箭头支持（那是 rankdir=TB 的特性）。
-            # 在 LR 模式下，"A->B" 会试图把 B 放在 A 的右边。
-            
-            # 修正策略：保持 rankdir=TB (Top-Bottom) 可能更适合 "垂直堆叠" 的描述？
-            # 用户说： "请放弃之前的“水平长流程”，改用垂直堆叠的方式... 图表从左到右依次为四个层级"
-            # 这听起来像是：
-            # Column 1 | Column 2 | Column 3 | Column 4
-            # Phase    | Tasks    | Subs     | Methods
-            #          |  ↓       |          |
-            #          | Task A   |-- Sub A  |
-            #          |  ↓       |          |
-            #          | Task B   |-- Sub B  |
-            
-            # 这是一个典型的 "Table-like" 或 "Matrix" 布局。
-            # 用 rankdir=LR 实现：
-            # Rank 1: Phase Label
-            # Rank 2: Tasks
-            # Rank 3: Subs
-            # Rank 4: Methods
-            
-            # 问题：Task A -> Task B 需要是垂直箭头。
-            # 在 rankdir=LR 中，同 Rank 的节点从上到下排列。
-            # 我们可以用 subgraph cluster 来包裹它们，并让它们自然堆叠。
-            # 显式的 A->B 箭头在 LR 模式下会变成 A 指向右边的 B（如果 B 在下一 Rank）或者 A 指向同 Rank 的 B（这会导致布局混乱）。
-            
-            # **关键 Trick**: 使用 `rankdir=TB`，但是强制 Cluster 从左到右排列？
-            # 不，Graphviz 很难做到 Cluster 横排而内容竖排。
-            
-            # **回归 LR 方案**:
-            # 让 Task A -> Task B 的箭头不可见 (`style=invis`) 或者用 `constraint=false` 加上 `dir=none` 仅仅为了定序？
-            # 其实在 LR 模式下，如果 Task A 和 Task B 都在 Rank 2，它们会自动垂直排列。
-            # 如果我们需要画箭头，可以用 `constraint=false`。
-            
-            # 隐藏所有与 method 相关的边（仅影响可视化，不影响布局）
-            if src_type == "method" or tgt_type == "method":
-                edge_attrs.update({"style": "invis", "arrowhead": "none", "constraint": "true"})
-            # 仅允许 task -> sub_content 显示为虚线（column2 -> column3），其余任何涉及 sub_content 的边都设为不可见
-            elif src_type == "task" and tgt_type == "sub_content":
-                edge_attrs.update({"style": "dashed", "arrowhead": "none"})
-            elif src_type == "sub_content" or tgt_type == "sub_content":
-                edge_attrs.update({"style": "invis", "arrowhead": "none"})
-            elif src_type == "task" and tgt_type == "task":
-                # 垂直连接 (同 Rank)
-                # 在 LR 模式下，这通常是不可见的排序约束，或者弯曲的箭头。
-                # 为了强制垂直排列，我们可以在同一个 subgraph 中列出它们。
-                edge_attrs.update({"style": "solid", "constraint": "false"}) 
-                # 注意：在 LR 布局中画垂直箭头很难看，通常我们省略箭头，只靠位置。
-                # 或者使用 HTML-like Label 表格？不，太复杂。
-                # 让我们尝试 constraint=false，看看效果。
-            
-            elif src_type == "task" and tgt_type == "sub_content":
-                # 向右展开 (跨 Rank: Task -> Sub)
-                edge_attrs.update({"style": "dashed", "arrowhead": "none"})
-            
-            elif src_type == "sub_content" and tgt_type == "method":
-                 # 向右 (跨 Rank: Sub -> Method) - 即使没有直接连线，布局上也应该在右边。
-                 pass
-
-        dot.edge(src_id, tgt_id, label=label, **edge_attrs)
+        # 任一端点不存在时类型为 None，查表自然落到默认样式
+        edge_attrs = BEAUTIFUL_EDGE_RULES.get((node_type_by_id.get(edge.source), node_type_by_id.get(edge.target)), BEAUTIFUL_EDGE_DEFAULT)
+        dot.edge(edge.source, edge.target, label=edge.label, **edge_attrs)
 
     # 3. 强制列对齐 (The 4 Columns)
     # 我们收集每一列的节点，强制它们属于同一个 Rank。
     # 注意：Phase 节点可能不存在（作为 Cluster 标签），或者如果是节点的话：
     
-    # 提取所有 Task
-    all_tasks = [n["id"] for n in nodes if n["type"] == "task"]
-    # 提取所有 Subs
-    all_subs = [n["id"] for n in nodes if n["type"] == "sub_content"]
-    # 提取所有 Methods
-    all_methods = [n["id"] for n in nodes if n["type"] == "method"]
-    
-    # Phase Labels (如果存在)
-    all_stages = [n["id"] for n in nodes if n["type"] == "stage_label"]
-
-    # 强制 Rank
-    if all_stages:
-        with dot.subgraph(name="rank_stage") as r:
-            r.attr(rank="same") # 并不是 same，因为 LR 布局下 rank 是列。
-            # 等等，LR 布局下，rank="same" 意味着它们在同一列（垂直线）。
-            # 这正是我们想要的！
-            for nid in all_stages: r.node(nid)
-    
-    if all_tasks:
-        with dot.subgraph(name="rank_task") as r:
-            r.attr(rank="same")
-            for nid in all_tasks: r.node(nid)
-            
-    if all_subs:
-        with dot.subgraph(name="rank_sub") as r:
-            r.attr(rank="same")
-            for nid in all_subs: r.node(nid)
-            
-    if all_methods:
-        with dot.subgraph(name="rank_method") as r:
-            r.attr(rank="same")
-            for nid in all_methods: r.node(nid)
+    # 单次遍历按列收集节点（Phase Labels 如果存在）
+    columns: Dict[NodeType, List[str]] = {NodeType.stage_label: [], NodeType.task: [], NodeType.sub_content: [], NodeType.method: []}
+    for n in nodes:
+        col = columns.get(n.type)
+        if col is not None:
+            col.append(n.id)
+    all_stages = columns[NodeType.stage_label]
+    all_tasks = columns[NodeType.task]
+    all_subs = columns[NodeType.sub_content]
+    all_methods = columns[NodeType.method]
+
+    # 强制 Rank：LR 布局下 rank="same" 意味着它们在同一列（垂直线）。
+    # 每列的节点引用合并为一行语句输出，避免逐个节点单独成行
+    for rank_name, col_ids in (("rank_stage", all_stages), ("rank_task", all_tasks), ("rank_sub", all_subs), ("rank_method", all_methods)):
+        if col_ids:
+            with dot.subgraph(name=rank_name) as r:
+                r.attr(rank="same")
+                r.node_refs(col_ids)
 
     # 4. 强制列之间的顺序 (Phase -> Task -> Sub -> Method)
     # 选取每列的一个代表节点，建立 invisible edge
@@ -429,12 +552,23 @@ def generate_beautiful_roadmap(
     for i in range(len(chain) - 1):
         dot.edge(chain[i], chain[i+1], style="invis", weight="100")
 
-    # 在主图上为第1列（stage）添加相邻箭头，按渲染顺序（stage_order）连接
-    for i in range(len(stage_order) - 1):
-        a = stage_order[i]
-        b = stage_order[i + 1]
-        if (a, b) not in existing_pairs:
-            dot.edge(a, b, style="solid", arrowhead="normal")
 
-    outfile = dot.render(filename=output_filename, format=output_format, cleanup=True)
-    return outfile
+def generate_beautiful_roadmap(
+    roadmap_data: Roadmap,
+    output_filename: str = "roadmap",
+    fontname: str = "Microsoft YaHei",
+    output_format: str = "svg",
+) -> str:
+    dot = _build_dot(f"{output_filename}.gv", _write_beautiful_roadmap, roadmap_data, fontname)
+    return dot.render(filename=output_filename, format=output_format, cleanup=True)
+
+
+async def generate_beautiful_roadmap_async(
+    roadmap_data: Roadmap,
+    output_filename: str = "roadmap",
+    fontname: str = "Microsoft YaHei",
+    output_format: str = "svg",
+) -> str:
+    # 异步版本：多张路线图可通过 asyncio.gather 并行调用 dot
+    dot = _build_dot(f"{output_filename}.gv", _write_beautiful_roadmap, roadmap_data, fontname)
+    return await dot.render_async(filename=output_filename, format=output_format, cleanup=True)